@@ -1,10 +1,12 @@
 # app/auth.py
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from datetime import datetime, timedelta
-from jose import JWTError, jwt
-from passlib.context import CryptContext
+import jwt
+from argon2 import PasswordHasher
+from argon2.exceptions import VerificationError, InvalidHashError
+import bcrypt
 
 # to get a string like this run:
 SECRET_KEY = "supersecretkey"
@@ -13,42 +15,62 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 
-def get_current_user(token: str = Depends(oauth2_scheme)):
+# async so the (cheap) decode doesn't pay for a threadpool hop on every request
+async def get_current_user(request: Request, token: str = Depends(oauth2_scheme)):
+    # decode once per request, whoever asks first
+    current_user = getattr(request.state, "current_user", None)
+    if current_user is not None:
+        return current_user
+
     try:
+        # PyJWT verifies the signature and the exp claim
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: str = payload.get("sub")
-        exp: int = payload.get("exp")
-
-        if user_id is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid authentication token",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
-        
-        # Check token expiration
-        if exp and datetime.utcfromtimestamp(exp) < datetime.utcnow():
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Token has expired",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
-        return {"user_id": user_id}
-    
-    except JWTError:
+    except jwt.ExpiredSignatureError:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has expired",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    except jwt.InvalidTokenError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    user_id: str = payload.get("sub")
+    if user_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid authentication token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    request.state.current_user = {"user_id": user_id}
+    return request.state.current_user
+
+# Argon2id with OWASP's recommended params (46 MiB, t=3, p=1)
+password_hasher = PasswordHasher(time_cost=3, memory_cost=46 * 1024, parallelism=1, hash_len=32, salt_len=16)
+
+def _is_bcrypt_hash(hashed_password: str):
+    return hashed_password.startswith("$2")
 
 def hash_password(password: str):
-    return pwd_context.hash(password)
+    return password_hasher.hash(password)
 
 def verify_password(plain_password: str, hashed_password: str):
-    return pwd_context.verify(plain_password, hashed_password)
+    # rows created before the argon2 switch still hold bcrypt hashes
+    if _is_bcrypt_hash(hashed_password):
+        try:
+            return bcrypt.checkpw(plain_password.encode(), hashed_password.encode())
+        except ValueError:
+            return False
+    try:
+        return password_hasher.verify(hashed_password, plain_password)
+    except (VerificationError, InvalidHashError):
+        return False
+
+def password_needs_rehash(hashed_password: str):
+    return _is_bcrypt_hash(hashed_password) or password_hasher.check_needs_rehash(hashed_password)
 
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
     to_encode = data.copy()
@@ -63,5 +85,5 @@ def decode_access_token(token: str):
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         return payload  # Return the payload if decoding is successful
-    except JWTError:
+    except jwt.InvalidTokenError:
         return None
\ No newline at end of file
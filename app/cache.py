@@ -0,0 +1,141 @@
+# app/cache.py
+import functools
+import gzip
+import inspect
+import os
+
+from fastapi import Request, Response
+
+from .responses import dump_json, gzip_body, is_gzipped
+
+try:
+    import redis.asyncio as redis
+    from redis.exceptions import RedisError
+except ImportError:  # caching is optional, the API works without redis installed
+    redis = None
+    RedisError = Exception
+
+# Leave REDIS_URL unset to run without a cache (e.g. local dev and tests)
+REDIS_URL = os.getenv("REDIS_URL")
+CACHE_TTL_SECONDS = 30
+
+
+class RedisCache:
+    def __init__(self, url: str | None = None, max_connections: int = 20):
+        self.url = url
+        self.max_connections = max_connections
+        self.pool = None
+        self.client = None
+
+    async def connect(self):
+        if not self.url or redis is None:
+            return
+        self.pool = redis.ConnectionPool.from_url(self.url, max_connections=self.max_connections)
+        self.client = redis.Redis(connection_pool=self.pool)
+
+    async def close(self):
+        if self.client is not None:
+            await self.client.aclose()
+            await self.pool.disconnect()
+        self.client = None
+        self.pool = None
+
+    # A broken cache should never take the API down, so errors count as misses
+    async def get(self, key: str) -> bytes | None:
+        if self.client is None:
+            return None
+        try:
+            return await self.client.get(key)
+        except RedisError:
+            return None
+
+    async def set(self, key: str, value: bytes, expire: int = CACHE_TTL_SECONDS):
+        if self.client is None:
+            return
+        try:
+            await self.client.set(key, value, ex=expire)
+        except RedisError:
+            pass
+
+    async def delete_pattern(self, pattern: str):
+        if self.client is None:
+            return
+        try:
+            keys = [key async for key in self.client.scan_iter(match=pattern, count=500)]
+            if keys:
+                await self.client.delete(*keys)
+        except RedisError:
+            pass
+
+
+cache = RedisCache(REDIS_URL)
+
+
+def _cached_response(body: bytes, request: Request) -> Response:
+    if not is_gzipped(body):
+        return Response(content=body, media_type="application/json")
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        # already compressed, the GZip middleware passes it through untouched
+        return Response(
+            content=body,
+            media_type="application/json",
+            headers={"Content-Encoding": "gzip", "Vary": "Accept-Encoding"},
+        )
+    return Response(content=gzip.decompress(body), media_type="application/json")
+
+
+def cached(prefix: str, ttl: int = CACHE_TTL_SECONDS, key_builder=None):
+    """Serve the endpoint's JSON body from redis, keyed by prefix + query params.
+
+    `key_builder` gets the endpoint kwargs (minus the db session) and returns the
+    key suffix; by default the param values are joined with ':'.
+    Bodies are stored gzipped (when large enough) so hits skip compression too.
+    Serving those relies on GZipMiddleware passing responses that already have a
+    Content-Encoding through untouched (Starlette >= 0.22, see requirements.txt).
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, cache_request: Request, **kwargs):
+            params = {name: value for name, value in kwargs.items() if name != "db"}
+            if key_builder:
+                suffix = key_builder(**params)
+            else:
+                suffix = ":".join(str(value) for value in params.values())
+            key = f"{prefix}:{suffix}"
+
+            body = await cache.get(key)
+            if body is None:
+                body = dump_json(await func(*args, **kwargs))
+                if cache.client is not None:
+                    body = gzip_body(body)
+                    await cache.set(key, body, expire=ttl)
+            return _cached_response(body, cache_request)
+
+        # let FastAPI inject the request alongside the endpoint's own params
+        signature = inspect.signature(func)
+        wrapper.__signature__ = signature.replace(parameters=[
+            *signature.parameters.values(),
+            inspect.Parameter("cache_request", inspect.Parameter.KEYWORD_ONLY, annotation=Request),
+        ])
+        return wrapper
+
+    return decorator
+
+
+def invalidates(*patterns: str):
+    """Drop cached keys after a successful write.
+
+    Patterns are str.format templates filled with the endpoint kwargs, e.g.
+    "feed:{current_user[user_id]}:*".
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            result = await func(*args, **kwargs)
+            for pattern in patterns:
+                await cache.delete_pattern(pattern.format(**kwargs))
+            return result
+
+        return wrapper
+
+    return decorator
@@ -1,44 +1,91 @@
 # app/main.py
+import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from datetime import timedelta
-from sqlalchemy import func
+from fastapi.concurrency import run_in_threadpool
+from fastapi.middleware.gzip import GZipMiddleware
+from datetime import datetime, timedelta
+from sqlalchemy import delete, exists, func, literal, select, tuple_, update
+from sqlalchemy.dialects.sqlite import insert
 
 from . import models, schemas, database, auth
 from .auth import get_current_user
-
-models.Base.metadata.create_all(bind=database.engine)
-
-app = FastAPI()
+from .cache import cache, cached, invalidates
+from .responses import GZIP_COMPRESSLEVEL, GZIP_MINIMUM_SIZE, json_response
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # The schema is created once at deploy time (python -m app.models), not by
+    # every worker on startup. DEV_CREATE_ALL=1 keeps the old auto-create for dev.
+    if os.getenv("DEV_CREATE_ALL"):
+        await models.create_tables()
+    await cache.connect()
+    yield
+    await cache.close()
+    await database.engine.dispose()
+
+app = FastAPI(lifespan=lifespan)
+# list responses are repetitive JSON and shrink several times over
+app.add_middleware(GZipMiddleware, minimum_size=GZIP_MINIMUM_SIZE, compresslevel=GZIP_COMPRESSLEVEL)
 
 # OAuth2 scheme
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 
-@app.get("/protected")
+# Keyset pagination: `cursor` is "<created_at>,<id>" of the last tweet on the
+# previous page. Unlike skip, the DB seeks straight to it through the
+# (created_at, id) indexes instead of reading and discarding skipped rows.
+def parse_cursor(cursor: str):
+    try:
+        created_at, tweet_id = cursor.rsplit(",", 1)
+        return datetime.fromisoformat(created_at), int(tweet_id)
+    except ValueError:
+        raise HTTPException(status_code=422, detail="Invalid cursor")
+
+def paginate_tweets(query, sort: str, cursor: str | None):
+    position = tuple_(models.Tweet.created_at, models.Tweet.id)
+    if cursor:
+        last = parse_cursor(cursor)
+        query = query.where(position > last if sort == "asc" else position < last)
+    if sort == "asc":
+        return query.order_by(models.Tweet.created_at.asc(), models.Tweet.id.asc())
+    return query.order_by(models.Tweet.created_at.desc(), models.Tweet.id.desc())
+
+@app.get("/protected", response_model=schemas.MessageResponse)
 def read_protected(current_user: dict = Depends(get_current_user)):
     return {"message": f"Hello user {current_user['user_id']}, you are authorized!"}
 
 # User Registration
+# Password hashing is CPU-bound (~100ms of argon2), so it runs in the threadpool
+# instead of blocking the event loop.
 @app.post("/register", response_model=schemas.UserResponse, status_code=201)
-def register(user: schemas.UserCreate, db: Session = Depends(database.get_db)):
-    existing = db.query(models.User).filter(models.User.username == user.username).first()
-    if existing:
+async def register(user: schemas.UserCreate, db: AsyncSession = Depends(database.get_db)):
+    hashed_pass = await run_in_threadpool(auth.hash_password, user.password)
+    # the unique username index decides duplicates, no SELECT beforehand
+    result = await db.execute(
+        insert(models.User).values(
+            username=user.username, hashed_password=hashed_pass
+        ).on_conflict_do_nothing(index_elements=["username"]).returning(
+            models.User.id, models.User.username
+        )
+    )
+    new_user = result.first()
+    if new_user is None:
         raise HTTPException(status_code=400, detail="Username already registered")
-    
-    hashed_pass = auth.hash_password(user.password)
-    new_user = models.User(username=user.username, hashed_password=hashed_pass)
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
     return new_user
 
 # User Login
-@app.post("/login")
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(database.get_db)):
-    user = db.query(models.User).filter(models.User.username == form_data.username).first()
-    if not user or not auth.verify_password(form_data.password, user.hashed_password):
+@app.post("/login", response_model=schemas.Token)
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(database.get_db)):
+    user = await db.scalar(select(models.User).where(models.User.username == form_data.username))
+    if not user or not await run_in_threadpool(auth.verify_password, form_data.password, user.hashed_password):
         raise HTTPException(status_code=400, detail="Invalid credentials")
+    # upgrade legacy bcrypt / outdated argon2 hashes while we have the plain password
+    if auth.password_needs_rehash(user.hashed_password):
+        user.hashed_password = await run_in_threadpool(auth.hash_password, form_data.password)
+        await db.commit()
     access_token = auth.create_access_token(
         data={"sub": str(user.id)},
         expires_delta=timedelta(minutes=auth.ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -46,273 +93,393 @@ def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depend
     return {"access_token": access_token, "token_type": "bearer"}
 
 @app.get("/users/{user_id}", response_model=schemas.UserProfileResponse)
-def get_user_profile(user_id: int, db: Session = Depends(database.get_db)):
-    user = db.query(models.User).filter(models.User.id == user_id).first()
-    if not user:
+@cached("users:profile")
+async def get_user_profile(user_id: int, db: AsyncSession = Depends(database.get_db)):
+    # user + all three counts in one round trip (scalar subqueries)
+    result = await db.execute(
+        select(
+            models.User.id,
+            models.User.username,
+            select(func.count(models.Tweet.id))
+            .where(models.Tweet.owner_id == user_id)
+            .scalar_subquery().label("tweet_count"),
+            select(func.count(models.Follow.id))
+            .where(models.Follow.followed_id == user_id)
+            .scalar_subquery().label("follower_count"),
+            select(func.count(models.Follow.id))
+            .where(models.Follow.follower_id == user_id)
+            .scalar_subquery().label("following_count"),
+        ).where(models.User.id == user_id)
+    )
+    profile = result.first()
+    if not profile:
         raise HTTPException(status_code=404, detail="User not found")
-    tweet_count = db.query(models.Tweet).filter(models.Tweet.owner_id == user_id).count()
-    follower_count = db.query(models.Follow).filter(models.Follow.followed_id == user_id).count()
-    following_count = db.query(models.Follow).filter(models.Follow.follower_id == user_id).count()
-    return {
-        "id": user.id,
-        "username": user.username,
-        "tweet_count": tweet_count,
-        "follower_count": follower_count,
-        "following_count": following_count
-    }
+    return profile._asdict()
 
 # --------------------------------Tweets CRUD----------------------
 
 # Create Tweets
 @app.post("/tweets", response_model=schemas.TweetResponse)
-def create_tweet(
+@invalidates("tweets:*", "feed:*", "users:profile:{current_user[user_id]}")
+async def create_tweet(
     tweet: schemas.TweetCreate,
-    db: Session = Depends(database.get_db),
+    db: AsyncSession = Depends(database.get_db),
     current_user: dict = Depends(get_current_user),
 ):
     new_tweet = models.Tweet(content=tweet.content, owner_id=current_user["user_id"])
     db.add(new_tweet)
-    db.commit()
-    db.refresh(new_tweet)
+    await db.commit()
+    await db.refresh(new_tweet)
     return new_tweet
 
+# Create many Tweets at once (imports, seeding)
+# One multi-row INSERT ... RETURNING instead of a round trip per tweet
+@app.post("/tweets/bulk", response_model=list[schemas.TweetResponse])
+@invalidates("tweets:*", "feed:*", "users:profile:{current_user[user_id]}")
+async def create_tweets_bulk(
+    tweets: schemas.TweetBulk,
+    db: AsyncSession = Depends(database.get_db),
+    current_user: dict = Depends(get_current_user),
+):
+    owner_id = int(current_user["user_id"])
+    result = await db.execute(
+        insert(models.Tweet)
+        .values([{"content": tweet.content, "owner_id": owner_id} for tweet in tweets.tweets])
+        .returning(
+            models.Tweet.id,
+            models.Tweet.content,
+            models.Tweet.owner_id,
+            models.Tweet.created_at,
+            models.Tweet.likes_count
+        )
+    )
+    # sqlite doesn't promise RETURNING order, hand them back in insert order
+    new_tweets = sorted(result.all(), key=lambda row: row.id)
+    await db.commit()
+    return json_response(new_tweets)
+
 # Get all Tweets
 @app.get("/tweets", response_model=list[schemas.TweetResponse])
-def get_tweets(
+@cached("tweets:list")
+async def get_tweets(
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
     sort: str = Query("desc", regex="^(asc|desc)$"),
-    db: Session = Depends(database.get_db),
+    cursor: str | None = Query(None),
+    db: AsyncSession = Depends(database.get_db),
 ):
-    query = db.query(
+    query = select(
         models.Tweet.id,
         models.Tweet.content,
         models.Tweet.owner_id,
         models.Tweet.created_at,
-        func.count(models.Like.id).label("likes_count")
-    ).outerjoin(models.Like).group_by(models.Tweet.id)
-
-    if sort == "asc":
-        query = query.order_by(models.Tweet.created_at.asc())
-    else:
-        query = query.order_by(models.Tweet.created_at.desc())
+        models.Tweet.likes_count
+    )
 
-    tweets = query.offset(skip).limit(limit).all()
-    return tweets
+    query = paginate_tweets(query, sort, cursor)
+    result = await db.execute(query.offset(skip).limit(limit))
+    return result.all()
 
 # Get my Tweets
 @app.get("/tweets/me", response_model=list[schemas.TweetResponse])
-def get_mytweets(
+async def get_mytweets(
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
     sort: str = Query("desc", regex="^(asc|desc)$"),
-    db: Session = Depends(database.get_db),
+    cursor: str | None = Query(None),
+    db: AsyncSession = Depends(database.get_db),
     current_user: dict = Depends(get_current_user),
 ):
-    query = db.query(
+    query = select(
         models.Tweet.id,
         models.Tweet.content,
         models.Tweet.owner_id,
         models.Tweet.created_at,
-        func.count(models.Like.id).label("likes_count")
-    ).outerjoin(models.Like).filter(
+        models.Tweet.likes_count
+    ).where(
         models.Tweet.owner_id == current_user["user_id"]
-    ).group_by(models.Tweet.id)
-
-    if sort == "asc":
-        query = query.order_by(models.Tweet.created_at.asc())
-    else:
-        query = query.order_by(models.Tweet.created_at.desc())
+    )
 
-    tweets = query.offset(skip).limit(limit).all()
-    return tweets
+    query = paginate_tweets(query, sort, cursor)
+    result = await db.execute(query.offset(skip).limit(limit))
+    return json_response(result.all())
 
 # Update a Tweet
 @app.put("/tweets/{tweet_id}", response_model=schemas.TweetResponse)
-def update_tweet(
+@invalidates("tweets:*", "feed:*")
+async def update_tweet(
     tweet_id: int,
     tweet: schemas.TweetUpdate,
-    db: Session = Depends(database.get_db),
+    db: AsyncSession = Depends(database.get_db),
     current_user: dict = Depends(get_current_user),
 ):
-    db_tweet = db.query(models.Tweet).filter(models.Tweet.id == tweet_id).first()
+    db_tweet = await db.get(models.Tweet, tweet_id)
     if not db_tweet:
         raise HTTPException(status_code=404, detail="Tweet not found")
     if db_tweet.owner_id != int(current_user["user_id"]):
         raise HTTPException(status_code=403, detail="Not authorized to update this tweet")
 
     db_tweet.content = tweet.content
-    db.commit()
-    db.refresh(db_tweet)
+    await db.commit()
+    await db.refresh(db_tweet)
     return db_tweet
 
 # Delete a Tweet
 @app.delete("/tweets/{tweet_id}", status_code=204)
-def delete_tweet(
+@invalidates("tweets:*", "feed:*", "users:profile:{current_user[user_id]}")
+async def delete_tweet(
     tweet_id: int,
-    db: Session = Depends(database.get_db),
+    db: AsyncSession = Depends(database.get_db),
     current_user: dict = Depends(get_current_user),
 ):
-    db_tweet = db.query(models.Tweet).filter(models.Tweet.id == tweet_id).first()
+    db_tweet = await db.get(models.Tweet, tweet_id)
     if not db_tweet:
         raise HTTPException(status_code=404, detail="Tweet not found")
     if db_tweet.owner_id != int(current_user["user_id"]):
         raise HTTPException(status_code=403, detail="Not authorized to delete this tweet")
 
-    db.delete(db_tweet)
-    db.commit()
+    await db.delete(db_tweet)
+    await db.commit()
     return None
 
 # ------------- Likes -----------------
 # Like a Tweet
 @app.post("/like", response_model=schemas.LikeResponse)
-def like_tweet(
+@invalidates("tweets:*", "feed:*")
+async def like_tweet(
     like: schemas.LikeBase,
-    db: Session = Depends(database.get_db),
+    db: AsyncSession = Depends(database.get_db),
     current_user: dict = Depends(get_current_user),
 ):
-    tweet = db.query(models.Tweet).filter(models.Tweet.id == like.tweet_id).first()
-    if not tweet:
+    tweet_exists = await db.scalar(select(exists().where(models.Tweet.id == like.tweet_id)))
+    if not tweet_exists:
         raise HTTPException(status_code=404, detail="Tweet not found")
 
-    existing_like = db.query(models.Like).filter(
-        models.Like.user_id == current_user["user_id"],
-        models.Like.tweet_id == like.tweet_id
-    ).first()
-    if existing_like:
+    result = await db.execute(
+        insert(models.Like).values(
+            user_id=int(current_user["user_id"]), tweet_id=like.tweet_id
+        ).on_conflict_do_nothing(index_elements=["user_id", "tweet_id"]).returning(
+            models.Like.id, models.Like.user_id, models.Like.tweet_id
+        )
+    )
+    new_like = result.first()
+    if new_like is None:
         raise HTTPException(status_code=400, detail="You already liked this tweet")
-
-    new_like = models.Like(user_id=current_user["user_id"], tweet_id=like.tweet_id)
-    db.add(new_like)
-    db.commit()
-    db.refresh(new_like)
+    # likes_count is kept on the tweet so list queries need no join on likes
+    await db.execute(
+        update(models.Tweet).where(models.Tweet.id == like.tweet_id)
+        .values(likes_count=models.Tweet.likes_count + 1)
+    )
+    await db.commit()
     return new_like
 
+# Like many Tweets at once (imports, backfills)
+# One INSERT ... SELECT: unknown tweets are skipped by the SELECT, existing likes
+# by ON CONFLICT, so the whole batch is a single statement.
+@app.post("/like/bulk", response_model=schemas.BulkResponse)
+@invalidates("tweets:*", "feed:*")
+async def like_tweets_bulk(
+    likes: schemas.LikeBulk,
+    db: AsyncSession = Depends(database.get_db),
+    current_user: dict = Depends(get_current_user),
+):
+    result = await db.execute(
+        insert(models.Like).from_select(
+            ["user_id", "tweet_id"],
+            select(literal(int(current_user["user_id"])), models.Tweet.id)
+            .where(models.Tweet.id.in_(likes.tweet_ids)),
+        ).on_conflict_do_nothing(index_elements=["user_id", "tweet_id"]).returning(models.Like.tweet_id)
+    )
+    liked_ids = result.scalars().all()
+    if liked_ids:
+        await db.execute(
+            update(models.Tweet).where(models.Tweet.id.in_(liked_ids))
+            .values(likes_count=models.Tweet.likes_count + 1)
+        )
+    await db.commit()
+    return {"created": len(liked_ids)}
+
 # Unlike a Tweet
-@app.delete("/like/{tweet_id}", status_code=200)
-def unlike_tweet(
+@app.delete("/like/{tweet_id}", response_model=schemas.MessageResponse, status_code=200)
+@invalidates("tweets:*", "feed:*")
+async def unlike_tweet(
     tweet_id: int,
-    db: Session = Depends(database.get_db),
+    db: AsyncSession = Depends(database.get_db),
     current_user: dict = Depends(auth.get_current_user),
 ):
-    like = db.query(models.Like).filter(
-        models.Like.user_id == current_user["user_id"],
-        models.Like.tweet_id == tweet_id
-    ).first()
-
-    if not like:
+    # decrement only if a like row actually went away, so the counter can't drift
+    result = await db.execute(
+        delete(models.Like).where(
+            models.Like.user_id == current_user["user_id"],
+            models.Like.tweet_id == tweet_id
+        ).returning(models.Like.id)
+    )
+    if result.first() is None:
         raise HTTPException(status_code=404, detail="Like not found")
 
-    db.delete(like)
-    db.commit()
+    await db.execute(
+        update(models.Tweet).where(models.Tweet.id == tweet_id)
+        .values(likes_count=models.Tweet.likes_count - 1)
+    )
+    await db.commit()
     return {"message": "Unliked successfully"}
 
 # Who liked a tweet
 @app.get("/tweets/{tweet_id}/likes", response_model=list[schemas.UserResponse])
-def get_likes(
+async def get_likes(
     tweet_id: int,
-    db: Session = Depends(database.get_db),
+    db: AsyncSession = Depends(database.get_db),
 ):
-    tweet = db.query(models.Tweet).filter(models.Tweet.id == tweet_id).first()
-    if not tweet:
+    tweet_exists = await db.scalar(select(exists().where(models.Tweet.id == tweet_id)))
+    if not tweet_exists:
         raise HTTPException(status_code=404, detail="Tweet not found")
 
-    likes = db.query(models.User).join(models.Like).filter(models.Like.tweet_id == tweet_id).all()
-    return likes
+    # plain (id, username) rows, no User objects to hydrate
+    likes = await db.execute(
+        select(models.User.id, models.User.username)
+        .join(models.Like, models.Like.user_id == models.User.id)
+        .where(models.Like.tweet_id == tweet_id)
+    )
+    return json_response(likes.all())
 
 # Tweet search
 @app.get("/tweets/search", response_model=list[schemas.TweetResponse])
-def search_tweets(
+@cached("tweets:search")
+async def search_tweets(
     keyword: str = Query(..., min_length=1),
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
-    db: Session = Depends(database.get_db)
+    cursor: str | None = Query(None),
+    db: AsyncSession = Depends(database.get_db)
 ):
-    query = db.query(
+    query = select(
         models.Tweet.id,
         models.Tweet.content,
         models.Tweet.owner_id,
         models.Tweet.created_at,
-        func.count(models.Like.id).label("likes_count")
-    ).outerjoin(models.Like).filter(
-        models.Tweet.content.ilike(f"%{keyword}%")
-    ).group_by(models.Tweet.id).order_by(models.Tweet.created_at.desc())
-    tweets = query.offset(skip).limit(limit).all()
-    return tweets
+        models.Tweet.likes_count
+    ).where(
+        # the trigram index matches case-insensitively, like ilike did
+        models.Tweet.id.in_(
+            select(models.tweet_search.c.rowid)
+            .where(models.tweet_search.c.content.like(f"%{keyword}%"))
+        )
+    )
+    query = paginate_tweets(query, "desc", cursor)
+    result = await db.execute(query.offset(skip).limit(limit))
+    return result.all()
 # -------------------------------- Follows ----------------------------
 # Follow a User
 @app.post("/follow", response_model=schemas.FollowResponse)
-def follow_user(
+@invalidates(
+    "feed:{current_user[user_id]}:*",
+    "users:profile:{current_user[user_id]}",
+    "users:profile:{follow.followed_id}",
+)
+async def follow_user(
     follow: schemas.FollowBase,
-    db: Session = Depends(database.get_db),
+    db: AsyncSession = Depends(database.get_db),
     current_user: dict = Depends(get_current_user)
 ):
     if int(current_user["user_id"]) == follow.followed_id:
         raise HTTPException(status_code=400, detail="You cannot follow yourself")
-    
-    target = db.query(models.User).filter(models.User.id == follow.followed_id).first()
-    if not target:
+
+    target_exists = await db.scalar(select(exists().where(models.User.id == follow.followed_id)))
+    if not target_exists:
         raise HTTPException(status_code=404, detail="User to follow not found")
-    
-    existing = db.query(models.Follow).filter(
-        models.Follow.follower_id == current_user["user_id"],
-        models.Follow.followed_id == follow.followed_id
-    ).first()
-    if existing:
+
+    result = await db.execute(
+        insert(models.Follow).values(
+            follower_id=int(current_user["user_id"]), followed_id=follow.followed_id
+        ).on_conflict_do_nothing(index_elements=["follower_id", "followed_id"]).returning(
+            models.Follow.id, models.Follow.follower_id, models.Follow.followed_id
+        )
+    )
+    new_follow = result.first()
+    if new_follow is None:
         raise HTTPException(status_code=400, detail="You are already following this user")
-    
-    new_follow = models.Follow(follower_id=current_user["user_id"], followed_id=follow.followed_id)
-    db.add(new_follow)
-    db.commit()
-    db.refresh(new_follow)
+    await db.commit()
     return new_follow
 
+# Follow many Users at once, same single-statement approach as /like/bulk
+@app.post("/follow/bulk", response_model=schemas.BulkResponse)
+@invalidates(
+    "feed:{current_user[user_id]}:*",
+    "users:profile:*",
+)
+async def follow_users_bulk(
+    follows: schemas.FollowBulk,
+    db: AsyncSession = Depends(database.get_db),
+    current_user: dict = Depends(get_current_user),
+):
+    follower_id = int(current_user["user_id"])
+    result = await db.execute(
+        insert(models.Follow).from_select(
+            ["follower_id", "followed_id"],
+            select(literal(follower_id), models.User.id).where(
+                models.User.id.in_(follows.followed_ids),
+                models.User.id != follower_id,
+            ),
+        ).on_conflict_do_nothing(index_elements=["follower_id", "followed_id"]).returning(models.Follow.id)
+    )
+    created = len(result.all())
+    await db.commit()
+    return {"created": created}
+
 # Unfollow a User
-@app.delete("/follow/{user_id}", status_code=200)
-def unfollow_user(
+@app.delete("/follow/{user_id}", response_model=schemas.MessageResponse, status_code=200)
+@invalidates(
+    "feed:{current_user[user_id]}:*",
+    "users:profile:{current_user[user_id]}",
+    "users:profile:{user_id}",
+)
+async def unfollow_user(
     user_id: int,
-    db: Session = Depends(database.get_db),
+    db: AsyncSession = Depends(database.get_db),
     current_user: dict = Depends(get_current_user)
 ):
-    follow = db.query(models.Follow).filter(
+    follow = await db.scalar(select(models.Follow).where(
         models.Follow.follower_id == current_user["user_id"],
         models.Follow.followed_id == user_id
-    ).first()
+    ))
 
     if not follow:
         raise HTTPException(status_code=404, detail="Follow relationship not found")
-    
-    db.delete(follow)
-    db.commit()
+
+    await db.delete(follow)
+    await db.commit()
     return {"message": "Unfollowed successfully"}
 
 # Tweets from followed users
 @app.get("/feed", response_model=list[schemas.TweetResponse])
-def get_feed(
+@cached(
+    "feed",
+    key_builder=lambda skip, limit, sort, cursor, current_user: (
+        f"{current_user['user_id']}:{skip}:{limit}:{sort}:{cursor}"
+    ),
+)
+async def get_feed(
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
     sort: str = Query("desc", regex="^(asc|desc)$"),
-    db: Session = Depends(database.get_db),
+    cursor: str | None = Query(None),
+    db: AsyncSession = Depends(database.get_db),
     current_user: dict = Depends(get_current_user)
 ):
-    following_ids = db.query(models.Follow.followed_id).filter(
+    following_ids = select(models.Follow.followed_id).where(
         models.Follow.follower_id == current_user["user_id"]
-    ).subquery()
+    )
 
-    query = db.query(
+    query = select(
         models.Tweet.id,
         models.Tweet.content,
         models.Tweet.owner_id,
         models.Tweet.created_at,
-        func.count(models.Like.id).label("likes_count")
-    ).outerjoin(models.Like).filter(
+        models.Tweet.likes_count
+    ).where(
         models.Tweet.owner_id.in_(following_ids)
-    ).group_by(models.Tweet.id)
-
-    if sort == "asc":
-        query = query.order_by(models.Tweet.created_at.asc())
-    else:
-        query = query.order_by(models.Tweet.created_at.desc())
+    )
 
-    tweets = query.offset(skip).limit(limit).all()
-    return tweets
\ No newline at end of file
+    query = paginate_tweets(query, sort, cursor)
+    result = await db.execute(query.offset(skip).limit(limit))
+    return result.all()
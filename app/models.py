@@ -1,9 +1,15 @@
 # app/models.py
 
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Text, Table, func, UniqueConstraint
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Text, Table, func, UniqueConstraint, Index, table, column, text, inspect
 from sqlalchemy.orm import relationship
-from datetime import datetime
-from .database import Base
+import asyncio
+from datetime import datetime, timezone
+from .database import Base, engine
+
+# SQLAlchemy stores DateTime in SQLite as 'YYYY-MM-DD HH:MM:SS.ffffff'. Values
+# SQLite writes itself ('... HH:MM:SS') sort below their own cursor, since
+# '12:00:05' < '12:00:05.000000', and the page repeats forever.
+CREATED_AT_SQL = "strftime('%Y-%m-%d %H:%M:%f000', {})"
 
 class User(Base):
     __tablename__ = "users"
@@ -13,39 +19,125 @@ class User(Base):
     hashed_password = Column(String, nullable=False)
 
     # tweets thingy
-    tweets = relationship("Tweet", back_populates="owner")
-    likes = relationship("Like", back_populates="user")
+    # relationships never lazy load: queries that need them must use
+    # joinedload (many-to-one) or selectinload (one-to-many) explicitly
+    tweets = relationship("Tweet", back_populates="owner", lazy="raise_on_sql")
+    likes = relationship("Like", back_populates="user", lazy="raise_on_sql")
 
 class Tweet(Base):
     __tablename__ = "tweets"
     id = Column(Integer, primary_key=True, index=True)
     content = Column(String, nullable=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # set in Python so stored values keep microseconds and compare exactly
+    # against bound datetimes (keyset pagination on created_at, id). The server
+    # default writes the same text, func.now() would drop the fraction.
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc),
+                        server_default=text("(" + CREATED_AT_SQL.format("'now'") + ")"))
     owner_id = Column(Integer, ForeignKey("users.id"))
+    # maintained by the like/unlike endpoints, saves a COUNT + GROUP BY per list
+    likes_count = Column(Integer, nullable=False, default=0, server_default="0")
+
+    owner = relationship("User", back_populates="tweets", lazy="raise_on_sql")
+    likes = relationship("Like", back_populates="tweet", lazy="raise_on_sql")
+
+    __table_args__ = (
+        # per-user timelines: filter on owner, newest first
+        Index('ix_tweet_owner_created', 'owner_id', 'created_at'),
+        # global timeline keyset: ORDER BY created_at, id
+        Index('ix_tweet_created_id', 'created_at', 'id'),
+    )
 
-    owner = relationship("User", back_populates="tweets")
-    likes = relationship("Like", back_populates="tweet")
+# Trigram full-text index over tweets.content (SQLite's take on pg_trgm) so
+# search can answer LIKE '%keyword%' from the index instead of scanning tweets.
+# It's an external-content FTS5 table kept in sync by triggers, set up by
+# create_tables().
+tweet_search = table("tweets_fts", column("rowid"), column("content"))
+
+TWEET_SEARCH_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS tweets_fts USING fts5("
+    "content, content='tweets', content_rowid='id', tokenize='trigram')",
+    "CREATE TRIGGER IF NOT EXISTS tweets_fts_insert AFTER INSERT ON tweets BEGIN "
+    "INSERT INTO tweets_fts(rowid, content) VALUES (new.id, new.content); END",
+    "CREATE TRIGGER IF NOT EXISTS tweets_fts_delete AFTER DELETE ON tweets BEGIN "
+    "INSERT INTO tweets_fts(tweets_fts, rowid, content) VALUES ('delete', old.id, old.content); END",
+    "CREATE TRIGGER IF NOT EXISTS tweets_fts_update AFTER UPDATE OF content ON tweets BEGIN "
+    "INSERT INTO tweets_fts(tweets_fts, rowid, content) VALUES ('delete', old.id, old.content); "
+    "INSERT INTO tweets_fts(rowid, content) VALUES (new.id, new.content); END",
+)
+
+# Databases created before the server default above keep CURRENT_TIMESTAMP as
+# theirs (SQLite can't alter a default), so rows that arrive without a fraction
+# get one after insert, and old rows are fixed up by create_tables().
+TWEET_CREATED_AT_DDL = (
+    "CREATE TRIGGER IF NOT EXISTS tweets_created_at_format AFTER INSERT ON tweets "
+    "WHEN new.created_at NOT LIKE '%.%' BEGIN "
+    f"UPDATE tweets SET created_at = {CREATED_AT_SQL.format('new.created_at')} WHERE id = new.id; END",
+    f"UPDATE tweets SET created_at = {CREATED_AT_SQL.format('created_at')} WHERE created_at NOT LIKE '%.%'",
+)
 
 class Like(Base):
     __tablename__ = "likes"
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
-    tweet_id = Column(Integer, ForeignKey("tweets.id"))
+    tweet_id = Column(Integer, ForeignKey("tweets.id"), index=True)
+
+    user = relationship("User", back_populates="likes", lazy="raise_on_sql")
+    tweet = relationship("Tweet", back_populates="likes", lazy="raise_on_sql")
 
-    user = relationship("User", back_populates="likes")
-    tweet = relationship("Tweet", back_populates="likes")
+    __table_args__ = (
+        Index('ix_like_user_tweet', 'user_id', 'tweet_id', unique=True),
+    )
 
 
 class Follow(Base):
     __tablename__ = "follows"
     id = Column(Integer, primary_key=True, index=True)
     follower_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"))
-    followed_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"))
+    # follower_id lookups are covered by the unique constraint below
+    followed_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), index=True)
 
     __table_args__ = (  # Fixed typo
         UniqueConstraint('follower_id', 'followed_id', name='unique_follower_followed'),
     )
 
-    follower = relationship("User", foreign_keys=[follower_id])
-    followed = relationship("User", foreign_keys=[followed_id])
\ No newline at end of file
+    follower = relationship("User", foreign_keys=[follower_id], lazy="raise_on_sql")
+    followed = relationship("User", foreign_keys=[followed_id], lazy="raise_on_sql")
+
+
+def create_missing_indexes(sync_conn):
+    # create_all skips tables that already exist, new indexes on them included
+    like_indexes = {index["name"] for index in inspect(sync_conn).get_indexes("likes")}
+    if "ix_like_user_tweet" not in like_indexes:
+        # likes weren't unique before this index, keep the first of any repeats
+        sync_conn.execute(text(
+            "DELETE FROM likes WHERE id NOT IN (SELECT min(id) FROM likes GROUP BY user_id, tweet_id)"
+        ))
+    for model_table in Base.metadata.sorted_tables:
+        for index in model_table.indexes:
+            index.create(sync_conn, checkfirst=True)
+
+
+async def create_tables():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        if conn.dialect.name == "sqlite":
+            # Everything is idempotent, so this also upgrades a database that
+            # predates the search index; 'rebuild' then indexes existing tweets.
+            await conn.run_sync(create_missing_indexes)
+            for statement in TWEET_CREATED_AT_DDL + TWEET_SEARCH_DDL:
+                await conn.execute(text(statement))
+            # create_all doesn't add columns to existing tables: give older
+            # databases likes_count and count the likes they already have
+            tweet_columns = (await conn.execute(text("PRAGMA table_info(tweets)"))).all()
+            if "likes_count" not in {row.name for row in tweet_columns}:
+                await conn.execute(text("ALTER TABLE tweets ADD COLUMN likes_count INTEGER NOT NULL DEFAULT 0"))
+                await conn.execute(text(
+                    "UPDATE tweets SET likes_count = (SELECT count(*) FROM likes WHERE likes.tweet_id = tweets.id)"
+                ))
+            await conn.execute(text("INSERT INTO tweets_fts(tweets_fts) VALUES ('rebuild')"))
+
+
+# Deploy step that sets up the schema once: python -m app.models
+if __name__ == "__main__":
+    asyncio.run(create_tables())
\ No newline at end of file
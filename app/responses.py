@@ -0,0 +1,40 @@
+# app/responses.py
+import gzip
+
+import orjson
+from fastapi import Response
+
+# shared by the GZip middleware and the cache, which stores compressed bodies
+GZIP_MINIMUM_SIZE = 500
+GZIP_COMPRESSLEVEL = 4
+
+
+def _encode_row(obj):
+    # SQLAlchemy Row from a column select, e.g. select(Tweet.id, Tweet.content)
+    if hasattr(obj, "_asdict"):
+        return obj._asdict()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def dump_json(content) -> bytes:
+    return orjson.dumps(content, default=_encode_row)
+
+
+def json_response(content) -> Response:
+    """JSON response for rows we read from our own DB.
+
+    Skips response_model validation (the route's response_model then only
+    documents the shape in OpenAPI); orjson encodes rows and datetimes directly.
+    """
+    return Response(content=dump_json(content), media_type="application/json")
+
+
+def gzip_body(body: bytes) -> bytes:
+    """Compress bodies big enough to be worth it, leave small ones as they are."""
+    if len(body) < GZIP_MINIMUM_SIZE:
+        return body
+    return gzip.compress(body, compresslevel=GZIP_COMPRESSLEVEL, mtime=0)
+
+
+def is_gzipped(body: bytes) -> bool:
+    return body[:2] == b"\x1f\x8b"
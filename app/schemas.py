@@ -24,6 +24,17 @@ class UserProfileResponse(BaseModel):
         orm_mode = True
 
 
+class Token(BaseModel):
+    access_token: str
+    token_type: str
+
+class MessageResponse(BaseModel):
+    message: str
+
+class BulkResponse(BaseModel):
+    created: int
+
+
 # Tweet schemas
 class TweetBase(BaseModel):
     content: str
@@ -34,6 +45,9 @@ class TweetCreate(TweetBase):
 class TweetUpdate(TweetBase):
     pass
 
+class TweetBulk(BaseModel):
+    tweets: list[TweetCreate] = Field(..., min_length=1, max_length=999)
+
 class TweetResponse(TweetBase):
     id: int
     content: str
@@ -55,10 +69,16 @@ class LikeResponse(LikeBase):
     class Config:
         orm_mode = True
 
+class LikeBulk(BaseModel):
+    tweet_ids: list[int] = Field(..., min_length=1, max_length=999)
+
 # Follow schemas
 class FollowBase(BaseModel):
     followed_id: int
 
+class FollowBulk(BaseModel):
+    followed_ids: list[int] = Field(..., min_length=1, max_length=999)
+
 class FollowResponse(BaseModel):
     id: int
     follower_id: int
@@ -1,8 +1,21 @@
-import site
-import coverage
-coverage.process_startup()
+import os
 import uvicorn
-from app.main import app
+
+# Server-side coverage is opt-in (set COVERAGE_PROCESS_START to a coverage
+# config, e.g. .coveragerc) so normal runs don't pay for line tracing.
+if os.getenv("COVERAGE_PROCESS_START"):
+    import coverage
+    coverage.process_startup()
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="127.0.0.1", port=8000)
\ No newline at end of file
+    # uvloop/httptools are the C event loop and HTTP parser from uvicorn[standard];
+    # one worker per core so CPU-bound work (argon2, JSON) scales across cores
+    uvicorn.run(
+        "app.main:app",
+        host="127.0.0.1",
+        port=8000,
+        loop="uvloop",
+        http="httptools",
+        workers=os.cpu_count(),
+        log_level="warning",
+    )
\ No newline at end of file
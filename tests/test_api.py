@@ -1,403 +1,795 @@
 # tests/test_api.py
+import base64
+import fnmatch
+import functools
+import os
+import sqlite3
+import sys
+import time
 import unittest
-import requests
-from datetime import datetime
-from jose import JWTError, jwt
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from pathlib import Path
+import bcrypt
+import httpx
+import orjson
 
 BASE_URL = "http://127.0.0.1:8000"
-
-class TwitterAPITests(unittest.TestCase):  # Fixed class name
+# By default the app runs in-process (no server, no sockets) against a fresh
+# test.db. INTEGRATION=1 runs the suite against a live server at BASE_URL instead.
+INTEGRATION = bool(os.getenv("INTEGRATION"))
+TEST_DATABASE = "test.db"
+# INTEGRATION reruns hit the same server DB, so tokens from an earlier run stay
+# valid until they expire. Reusing them skips the password hash on login.
+# Delete the file after wiping the server's database.
+TOKEN_CACHE_FILE = ".pytest_jwt_cache.json"
+
+if not INTEGRATION:
+    # so `python tests/test_api.py` (the concurrent runner) can import app too,
+    # not just pytest with its pythonpath setting
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+    os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///./{TEST_DATABASE}"
+    os.environ["DEV_CREATE_ALL"] = "1"
+    from fastapi.testclient import TestClient
+    from sqlalchemy import event
+    from app import database
+    from app.auth import create_access_token
+    from app.cache import cache
+    from app.main import app
+
+
+# Only used to read the claims of tokens the server just issued us, so skip
+# the signature check and decode the payload segment directly
+@functools.lru_cache(maxsize=256)
+def decode_token(token):
+    payload = token.split(".")[1]
+    return orjson.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+
+
+def load_cached_token(username):
+    if not INTEGRATION:
+        return None  # the in-process DB is new every run
+    try:
+        with open(TOKEN_CACHE_FILE, "rb") as f:
+            token = orjson.loads(f.read()).get(f"{BASE_URL}|{username}")
+    except (OSError, orjson.JSONDecodeError):
+        return None
+    if token and decode_token(token)["exp"] > time.time() + 30:
+        return token
+    return None
+
+
+def save_cached_token(username, token):
+    if not INTEGRATION:
+        return
+    try:
+        with open(TOKEN_CACHE_FILE, "rb") as f:
+            tokens = orjson.loads(f.read())
+    except (OSError, orjson.JSONDecodeError):
+        tokens = {}
+    tokens[f"{BASE_URL}|{username}"] = token
+    with open(TOKEN_CACHE_FILE, "wb") as f:
+        f.write(orjson.dumps(tokens))
+
+
+# One Authorization dict per token, shared by every request that sends it
+@functools.lru_cache(maxsize=32)
+def auth_headers(token):
+    return {"Authorization": f"Bearer {token}"}
+
+
+# Pre-encoded form bodies are raw bytes, which httpx sends without a content
+# type, so login_user passes this shared dict instead of building one per call
+FORM_HEADERS = {"Content-Type": "application/x-www-form-urlencoded"}
+
+
+# A user's login form never changes, so url-encode it once
+@functools.lru_cache(maxsize=32)
+def login_form(username, password):
+    return urllib.parse.urlencode({"username": username, "password": password}).encode()
+
+
+# orjson parses response bodies noticeably faster than response.json()
+def j(response):
+    return orjson.loads(response.content)
+
+
+# Shared client and request helpers; subclasses set up their own data
+class APITestCase(unittest.TestCase):
     @classmethod
-    def setUpClass(cls):
-        # Ensure clean state by trying to register users, handle duplicates
-        try:
-            cls.alice = cls.register_user("alice_test", "password123")
-        except AssertionError:
-            # User might exist, try logging in
-            cls.alice_token = cls.login_user("alice_test", "password123")
-            cls.alice = {"id": cls.decode_token(cls.alice_token)["sub"], "username": "alice_test"}
+    def open_client(cls):
+        if INTEGRATION:
+            # One keep-alive client for the whole suite instead of a new
+            # TCP connection per request
+            client = httpx.Client(
+                base_url=BASE_URL,
+                limits=httpx.Limits(max_connections=32, max_keepalive_connections=32),
+            )
         else:
-            cls.alice_token = cls.login_user("alice_test", "password123")
+            if os.path.exists(TEST_DATABASE):
+                os.remove(TEST_DATABASE)
+            client = TestClient(app)
+        # entering the TestClient runs the app's lifespan, which creates the tables
+        cls.s = client.__enter__()
+        # for tests that fire several independent requests at once, see get_all
+        cls.pool = ThreadPoolExecutor(max_workers=8)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.pool.shutdown()
+        cls.s.__exit__(None, None, None)
+
+    @classmethod
+    def _post(cls, path, *, json=None, content=None, token=None, headers=None, expect=200):
+        if token:
+            headers = auth_headers(token)
+        response = cls.s.post(path, json=json, content=content, headers=headers)
+        assert response.status_code == expect, f"POST {path} failed: {response.text}"
+        return j(response)
+
+    @classmethod
+    def register_user(cls, username, password):
+        return cls._post("/register", json={"username": username, "password": password}, expect=201)
+
+    @classmethod
+    def login_user(cls, username, password):
+        return cls._post("/login", content=login_form(username, password), headers=FORM_HEADERS)["access_token"]
 
+    @classmethod
+    def register_or_login(cls, username, password):
+        token = load_cached_token(username)
+        if token:
+            return {"id": decode_token(token)["sub"], "username": username}, token
+
+        # Log in first: against an existing DB (INTEGRATION reruns) that's the
+        # only request. An unknown username fails fast, before any hashing.
         try:
-            cls.bob = cls.register_user("bob_test", "password123")
+            token = cls.login_user(username, password)
         except AssertionError:
-            cls.bob_token = cls.login_user("bob_test", "password123")
-            cls.bob = {"id": cls.decode_token(cls.bob_token)["sub"], "username": "bob_test"}
+            user = cls.register_user(username, password)
+            token = cls.login_user(username, password)
         else:
-            cls.bob_token = cls.login_user("bob_test", "password123")
-
-        # Create tweets for Alice (10) and Bob (5)
-        cls.alice_tweets = []
-        cls.bob_tweets = []
-        for i in range(10):
-            tweet = cls.create_tweet(f"Alice's tweet {i+1}", cls.alice_token)
-            cls.alice_tweets.append(tweet)
-        for i in range(5):
-            tweet = cls.create_tweet(f"Bob's tweet {i+1}", cls.bob_token)
-            cls.bob_tweets.append(tweet)
+            user = {"id": decode_token(token)["sub"], "username": username}
+        save_cached_token(username, token)
+        return user, token
+
+    @classmethod
+    def create_tweets(cls, contents, token):
+        return cls._post("/tweets/bulk", json={"tweets": [{"content": content} for content in contents]}, token=token)
+
+    @classmethod
+    def follow_user(cls, followed_id, token):
+        return cls._post("/follow", json={"followed_id": followed_id}, token=token)
+
+    @classmethod
+    def like_tweets(cls, tweet_ids, token):
+        return cls._post("/like/bulk", json={"tweet_ids": tweet_ids}, token=token)
+
+    def get_all(self, *urls, headers=None):
+        # Independent reads go out together over the connection pool
+        # instead of waiting on each other's round trip
+        return list(self.pool.map(lambda url: self.s.get(url, headers=headers), urls))
+
+
+class TwitterAPITests(APITestCase):  # Fixed class name
+    @classmethod
+    def setUpClass(cls):
+        cls.open_client()
+
+        cls.alice, cls.alice_token = cls.register_or_login("alice_test", "password123")
+        cls.bob, cls.bob_token = cls.register_or_login("bob_test", "password123")
+
+        # Built once here rather than in every request and assertion
+        cls.alice_id = int(cls.alice["id"])
+        cls.bob_id = int(cls.bob["id"])
+        cls.alice_auth = auth_headers(cls.alice_token)
+        cls.bob_auth = auth_headers(cls.bob_token)
+
+        # Create tweets for Alice (10) and Bob (5), one bulk request each
+        cls.alice_tweets = cls.create_tweets([f"Alice's tweet {i+1}" for i in range(10)], cls.alice_token)
+        cls.bob_tweets = cls.create_tweets([f"Bob's tweet {i+1}" for i in range(5)], cls.bob_token)
 
         # Alice follows Bob
-        cls.follow_user(cls.bob["id"], cls.alice_token)
+        cls.follow_user(cls.bob_id, cls.alice_token)
 
         # Alice likes Bob's first two tweets
-        cls.like_tweet(cls.bob_tweets[0]["id"], cls.alice_token)
-        cls.like_tweet(cls.bob_tweets[1]["id"], cls.alice_token)
-
-    @staticmethod
-    def register_user(username, password):
-        response = requests.post(
-            f"{BASE_URL}/register",
-            json={"username": username, "password": password}
-        )
-        assert response.status_code == 201, f"Register failed: {response.json()}"
-        return response.json()
-
-    @staticmethod
-    def login_user(username, password):
-        response = requests.post(
-            f"{BASE_URL}/login",
-            data={"username": username, "password": password},
-            headers={"Content-Type": "application/x-www-form-urlencoded"}
-        )
-        assert response.status_code == 200, f"Login failed: {response.json()}"
-        return response.json()["access_token"]
-    
-    
-    @staticmethod
-    def decode_token(token):
-        
-        return jwt.decode(token, "supersecretkey", algorithms=["HS256"])
-
-    @staticmethod
-    def create_tweet(content, token):
-        response = requests.post(
-            f"{BASE_URL}/tweets",
-            json={"content": content},
-            headers={"Authorization": f"Bearer {token}"}
-        )
-        assert response.status_code == 200, f"Create tweet failed: {response.json()}"
-        return response.json()
-
-    @staticmethod
-    def follow_user(followed_id, token):
-        response = requests.post(
-            f"{BASE_URL}/follow",
-            json={"followed_id": followed_id},
-            headers={"Authorization": f"Bearer {token}"}
-        )
-        assert response.status_code == 200, f"Follow failed: {response.json()}"
-        return response.json()
+        cls.like_tweets([cls.bob_tweets[0]["id"], cls.bob_tweets[1]["id"]], cls.alice_token)
 
-    @staticmethod
-    def like_tweet(tweet_id, token):
-        response = requests.post(
-            f"{BASE_URL}/like",
-            json={"tweet_id": tweet_id},
-            headers={"Authorization": f"Bearer {token}"}
-        )
-        assert response.status_code == 200, f"Like failed: {response.json()}"
-        return response.json()
+    def likes_count(self, tweet_id):
+        # the tweets whose likes the tests count are all Bob's
+        tweets = j(self.s.get("/tweets/me?limit=100", headers=self.bob_auth))
+        return next(tweet["likes_count"] for tweet in tweets if tweet["id"] == tweet_id)
 
     def test_register_user(self):
-        response = requests.post(
-            f"{BASE_URL}/register",
+        response = self.s.post(
+            "/register",
             json={"username": "charlie_test", "password": "password123"}
         )
         self.assertEqual(response.status_code, 201)
-        data = response.json()
+        data = j(response)
         self.assertEqual(data["username"], "charlie_test")
         self.assertIn("id", data)
 
         # Test duplicate username
-        response = requests.post(
-            f"{BASE_URL}/register",
+        response = self.s.post(
+            "/register",
             json={"username": "charlie_test", "password": "password123"}
         )
         self.assertEqual(response.status_code, 400)
-        self.assertEqual(response.json()["detail"], "Username already registered")
+        self.assertEqual(j(response)["detail"], "Username already registered")
 
     def test_login(self):
-        response = requests.post(
-            f"{BASE_URL}/login",
-            data={"username": "alice_test", "password": "password123"},
-            headers={"Content-Type": "application/x-www-form-urlencoded"}
+        response = self.s.post(
+            "/login",
+            data={"username": "alice_test", "password": "password123"}
         )
         self.assertEqual(response.status_code, 200)
-        data = response.json()
+        data = j(response)
         self.assertIn("access_token", data)
         self.assertEqual(data["token_type"], "bearer")
 
         # Test invalid credentials
-        response = requests.post(
-            f"{BASE_URL}/login",
-            data={"username": "alice_test", "password": "wrongpassword"},
-            headers={"Content-Type": "application/x-www-form-urlencoded"}
+        response = self.s.post(
+            "/login",
+            data={"username": "alice_test", "password": "wrongpassword"}
         )
         self.assertEqual(response.status_code, 400)
-        self.assertEqual(response.json()["detail"], "Invalid credentials")
+        self.assertEqual(j(response)["detail"], "Invalid credentials")
+
+    @unittest.skipIf(INTEGRATION, "needs direct access to the test database")
+    def test_login_upgrades_bcrypt_hash(self):
+        # a user from before the Argon2id switch still has a bcrypt hash
+        self.register_user("erin_test", "password123")
+        legacy_hash = bcrypt.hashpw(b"password123", bcrypt.gensalt()).decode()
+        with sqlite3.connect(TEST_DATABASE) as conn:
+            conn.execute(
+                "UPDATE users SET hashed_password = ? WHERE username = ?",
+                (legacy_hash, "erin_test"),
+            )
+
+        # the old hash still logs in, and the login rehashes it with argon2id
+        self.login_user("erin_test", "password123")
+        with sqlite3.connect(TEST_DATABASE) as conn:
+            (stored,) = conn.execute(
+                "SELECT hashed_password FROM users WHERE username = ?", ("erin_test",)
+            ).fetchone()
+        self.assertTrue(stored.startswith("$argon2id$"))
+        self.login_user("erin_test", "password123")
 
     def test_create_tweet(self):
-        response = requests.post(
-            f"{BASE_URL}/tweets",
+        response = self.s.post(
+            "/tweets",
             json={"content": "Test tweet"},
-            headers={"Authorization": f"Bearer {self.alice_token}"}
+            headers=self.alice_auth
         )
         self.assertEqual(response.status_code, 200)
-        data = response.json()
+        data = j(response)
         self.assertEqual(data["content"], "Test tweet")
-        self.assertEqual(data["owner_id"], int(self.alice["id"]))
+        self.assertEqual(data["owner_id"], self.alice_id)
         self.assertEqual(data["likes_count"], 0)
         self.assertIn("created_at", data)
 
     def test_get_tweets_pagination(self):
-        response = requests.get(
-            f"{BASE_URL}/tweets?skip=0&limit=5&sort=desc"
+        first, ascending = self.get_all(
+            "/tweets?limit=5&sort=desc",
+            "/tweets?limit=5&sort=asc",
         )
-        self.assertEqual(response.status_code, 200)
-        data = response.json()
-        self.assertLessEqual(len(data), 5)
+        self.assertEqual(first.status_code, 200)
+        data = j(first)
+        self.assertTrue(len(data) <= 5)
         if len(data) > 1:
-            self.assertGreaterEqual(
-                datetime.fromisoformat(data[0]["created_at"].replace("Z", "+00:00")),
-                datetime.fromisoformat(data[1]["created_at"].replace("Z", "+00:00"))
-            )
+            self.assertGreaterEqual(data[0]["created_at"], data[1]["created_at"])
 
-        # Second page
-        response = requests.get(
-            f"{BASE_URL}/tweets?skip=5&limit=5&sort=desc"
+        # Second page, continuing from the last tweet of the first
+        last = data[-1]
+        second = self.s.get(
+            "/tweets",
+            params={"limit": 5, "sort": "desc", "cursor": f"{last['created_at']},{last['id']}"}
         )
-        self.assertEqual(response.status_code, 200)
-        self.assertLessEqual(len(response.json()), 5)
+        self.assertEqual(second.status_code, 200)
+        self.assertTrue(len(j(second)) <= 5)
+        for tweet in j(second):
+            self.assertLessEqual(tweet["created_at"], last["created_at"])
+            self.assertNotIn(tweet["id"], [t["id"] for t in data])
 
         # Ascending sort
-        response = requests.get(
-            f"{BASE_URL}/tweets?skip=0&limit=5&sort=asc"
+        self.assertEqual(ascending.status_code, 200)
+        data = j(ascending)
+        if len(data) > 1:
+            self.assertLessEqual(data[0]["created_at"], data[1]["created_at"])
+
+    def test_get_tweets_cursor_pagination(self):
+        full, first = self.get_all(
+            "/tweets?limit=10&sort=desc",
+            "/tweets?limit=5&sort=desc",
+        )
+        self.assertEqual(full.status_code, 200)
+        expected = [tweet["id"] for tweet in j(full)]
+
+        # Two pages of 5 via the cursor of the last tweet on page one
+        first_page = j(first)
+        last = first_page[-1]
+        response = self.s.get(
+            "/tweets",
+            params={"limit": 5, "sort": "desc", "cursor": f"{last['created_at']},{last['id']}"}
         )
         self.assertEqual(response.status_code, 200)
-        data = response.json()
-        if len(data) > 1:
-            self.assertLessEqual(
-                datetime.fromisoformat(data[0]["created_at"].replace("Z", "+00:00")),
-                datetime.fromisoformat(data[1]["created_at"].replace("Z", "+00:00"))
-            )
+        second_page = j(response)
+        self.assertEqual([tweet["id"] for tweet in first_page + second_page], expected)
 
     def test_get_my_tweets_pagination(self):
-        response = requests.get(
-            f"{BASE_URL}/tweets/me?skip=0&limit=5&sort=desc",
-            headers={"Authorization": f"Bearer {self.alice_token}"}
+        first = self.s.get(
+            "/tweets/me?limit=5&sort=desc",
+            headers=self.alice_auth
         )
-        self.assertEqual(response.status_code, 200)
-        data = response.json()
-        self.assertLessEqual(len(data), 5)
+        self.assertEqual(first.status_code, 200)
+        data = j(first)
+        self.assertTrue(len(data) <= 5)
         for tweet in data:
-            self.assertEqual(tweet["owner_id"], int(self.alice["id"]))
+            self.assertEqual(tweet["owner_id"], self.alice_id)
         if len(data) > 1:
-            self.assertGreaterEqual(
-                datetime.fromisoformat(data[0]["created_at"].replace("Z", "+00:00")),
-                datetime.fromisoformat(data[1]["created_at"].replace("Z", "+00:00"))
-            )
+            self.assertGreaterEqual(data[0]["created_at"], data[1]["created_at"])
 
         # Second page
-        response = requests.get(
-            f"{BASE_URL}/tweets/me?skip=5&limit=5&sort=desc",
-            headers={"Authorization": f"Bearer {self.alice_token}"}
-        )
-        self.assertEqual(response.status_code, 200)
-        self.assertLessEqual(len(response.json()), 5)
+        last = data[-1]
+        second = self.s.get(
+            "/tweets/me",
+            params={"limit": 5, "sort": "desc", "cursor": f"{last['created_at']},{last['id']}"},
+            headers=self.alice_auth
+        )
+        self.assertEqual(second.status_code, 200)
+        self.assertTrue(len(j(second)) <= 5)
+        for tweet in j(second):
+            self.assertEqual(tweet["owner_id"], self.alice_id)
+            self.assertNotIn(tweet["id"], [t["id"] for t in data])
+
+    @unittest.skipIf(INTEGRATION, "needs direct access to the test database")
+    def test_cursor_pagination_over_server_default_timestamps(self):
+        # rows written by SQLite itself rather than the ORM: datetime('now') is
+        # what the old func.now() default stored, the rest take today's default
+        ivy, ivy_token = self.register_or_login("ivy_test", "password123")
+        self.create_tweets(["Ivy's tweet 1", "Ivy's tweet 2"], ivy_token)
+        with sqlite3.connect(TEST_DATABASE) as conn:
+            conn.executemany(
+                "INSERT INTO tweets (content, owner_id, created_at) VALUES (?, ?, datetime('now'))",
+                [("Ivy's tweet 3", ivy["id"]), ("Ivy's tweet 4", ivy["id"])],
+            )
+            conn.execute("INSERT INTO tweets (content, owner_id) VALUES (?, ?)", ("Ivy's tweet 5", ivy["id"]))
+        expected = [tweet["id"] for tweet in j(self.s.get("/tweets/me?limit=100", headers=auth_headers(ivy_token)))]
+        self.assertEqual(len(expected), 5)
+
+        # one tweet per page has to reach every row exactly once, either way round
+        for sort, order in (("desc", expected), ("asc", expected[::-1])):
+            with self.subTest(sort=sort):
+                seen, cursor = [], None
+                for _ in range(len(order) + 1):
+                    params = {"limit": 1, "sort": sort}
+                    if cursor:
+                        params["cursor"] = cursor
+                    page = j(self.s.get("/tweets/me", params=params, headers=auth_headers(ivy_token)))
+                    if not page:
+                        break
+                    seen.append(page[0]["id"])
+                    cursor = f"{page[0]['created_at']},{page[0]['id']}"
+                self.assertEqual(seen, order)
 
     def test_update_tweet(self):
         tweet_id = self.alice_tweets[0]["id"]
-        response = requests.put(
-            f"{BASE_URL}/tweets/{tweet_id}",
+        response = self.s.put(
+            f"/tweets/{tweet_id}",
             json={"content": "Updated tweet"},
-            headers={"Authorization": f"Bearer {self.alice_token}"}
+            headers=self.alice_auth
         )
         self.assertEqual(response.status_code, 200)
-        data = response.json()
+        data = j(response)
         self.assertEqual(data["content"], "Updated tweet")
 
         # Test unauthorized update
-        response = requests.put(
-            f"{BASE_URL}/tweets/{tweet_id}",
+        response = self.s.put(
+            f"/tweets/{tweet_id}",
             json={"content": "Unauthorized update"},
-            headers={"Authorization": f"Bearer {self.bob_token}"}
+            headers=self.bob_auth
         )
         self.assertEqual(response.status_code, 403)
 
     def test_delete_tweet(self):
         tweet_id = self.alice_tweets[1]["id"]
-        response = requests.delete(
-            f"{BASE_URL}/tweets/{tweet_id}",
-            headers={"Authorization": f"Bearer {self.alice_token}"}
+        response = self.s.delete(
+            f"/tweets/{tweet_id}",
+            headers=self.alice_auth
         )
         self.assertEqual(response.status_code, 204)
 
         # Test unauthorized delete
-        response = requests.delete(
-            f"{BASE_URL}/tweets/{self.alice_tweets[2]['id']}",
-            headers={"Authorization": f"Bearer {self.bob_token}"}
+        response = self.s.delete(
+            f"/tweets/{self.alice_tweets[2]['id']}",
+            headers=self.bob_auth
         )
         self.assertEqual(response.status_code, 403)
 
     def test_like_tweet(self):
         tweet_id = self.bob_tweets[2]["id"]
-        response = requests.post(
-            f"{BASE_URL}/like",
+        response = self.s.post(
+            "/like",
             json={"tweet_id": tweet_id},
-            headers={"Authorization": f"Bearer {self.alice_token}"}
+            headers=self.alice_auth
         )
         self.assertEqual(response.status_code, 200)
-        data = response.json()
+        data = j(response)
         self.assertEqual(data["tweet_id"], tweet_id)
-        self.assertEqual(data["user_id"], int(self.alice["id"]))
+        self.assertEqual(data["user_id"], self.alice_id)
+        self.assertEqual(self.likes_count(tweet_id), 1)
 
         # Test duplicate like
-        response = requests.post(
-            f"{BASE_URL}/like",
+        response = self.s.post(
+            "/like",
             json={"tweet_id": tweet_id},
-            headers={"Authorization": f"Bearer {self.alice_token}"}
+            headers=self.alice_auth
         )
         self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.likes_count(tweet_id), 1)
 
     def test_unlike_tweet(self):
         tweet_id = self.bob_tweets[0]["id"]
-        response = requests.delete(
-            f"{BASE_URL}/like/{tweet_id}",
-            headers={"Authorization": f"Bearer {self.alice_token}"}
+        response = self.s.delete(
+            f"/like/{tweet_id}",
+            headers=self.alice_auth
         )
         self.assertEqual(response.status_code, 200)
-        self.assertEqual(response.json()["message"], "Unliked successfully")
+        self.assertEqual(j(response)["message"], "Unliked successfully")
+        self.assertEqual(self.likes_count(tweet_id), 0)
 
         # Test unlike non-existent like
-        response = requests.delete(
-            f"{BASE_URL}/like/{tweet_id}",
-            headers={"Authorization": f"Bearer {self.alice_token}"}
+        response = self.s.delete(
+            f"/like/{tweet_id}",
+            headers=self.alice_auth
         )
         self.assertEqual(response.status_code, 404)
+        self.assertEqual(self.likes_count(tweet_id), 0)
 
     def test_get_likes(self):
         tweet_id = self.bob_tweets[1]["id"]
-        response = requests.get(f"{BASE_URL}/tweets/{tweet_id}/likes")
+        response = self.s.get(f"/tweets/{tweet_id}/likes")
         self.assertEqual(response.status_code, 200)
-        data = response.json()
+        data = j(response)
         self.assertEqual(len(data), 1)
         self.assertEqual(data[0]["username"], "alice_test")
 
     def test_follow_user(self):
-        response = requests.post(
-            f"{BASE_URL}/follow",
-            json={"followed_id": int(self.alice["id"])},
-            headers={"Authorization": f"Bearer {self.bob_token}"}
+        response = self.s.post(
+            "/follow",
+            json={"followed_id": self.alice_id},
+            headers=self.bob_auth
         )
         self.assertEqual(response.status_code, 200)
-        data = response.json()
-        self.assertEqual(data["follower_id"], int(self.bob["id"]))
-        self.assertEqual(data["followed_id"], int(self.alice["id"]))
+        data = j(response)
+        self.assertEqual(data["follower_id"], self.bob_id)
+        self.assertEqual(data["followed_id"], self.alice_id)
 
         # Test self-follow
-        response = requests.post(
-            f"{BASE_URL}/follow",
-            json={"followed_id": int(self.alice["id"])},
-            headers={"Authorization": f"Bearer {self.alice_token}"}
+        response = self.s.post(
+            "/follow",
+            json={"followed_id": self.alice_id},
+            headers=self.alice_auth
         )
         self.assertEqual(response.status_code, 400)
 
+    def test_bulk_follow(self):
+        dave, dave_token = self.register_or_login("dave_test", "password123")
+        # INTEGRATION reruns find dave already following bob from the last run
+        response = self.s.delete(f"/follow/{self.bob_id}", headers=auth_headers(dave_token))
+        self.assertIn(response.status_code, (200, 404))
+
+        # self-follow and unknown users are skipped
+        response = self.s.post(
+            "/follow/bulk",
+            json={"followed_ids": [self.bob_id, int(dave["id"]), 999999]},
+            headers=auth_headers(dave_token)
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(j(response)["created"], 1)
+
+        # Already followed
+        response = self.s.post(
+            "/follow/bulk",
+            json={"followed_ids": [self.bob_id]},
+            headers=auth_headers(dave_token)
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(j(response)["created"], 0)
+
+    def test_bulk_like(self):
+        tweet_ids = [self.bob_tweets[3]["id"], self.bob_tweets[4]["id"], 999999]
+        response = self.s.post(
+            "/like/bulk",
+            json={"tweet_ids": tweet_ids},
+            headers=self.bob_auth
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(j(response)["created"], 2)
+        self.assertEqual(self.likes_count(tweet_ids[0]), 1)
+        self.assertEqual(self.likes_count(tweet_ids[1]), 1)
+
+        # Duplicate likes are ignored
+        response = self.s.post(
+            "/like/bulk",
+            json={"tweet_ids": tweet_ids},
+            headers=self.bob_auth
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(j(response)["created"], 0)
+        self.assertEqual(self.likes_count(tweet_ids[0]), 1)
+        self.assertEqual(self.likes_count(tweet_ids[1]), 1)
+
     def test_unfollow_user(self):
-        # Check if Alice already follows Bob, unfollow if necessary
-        response = requests.get(f"{BASE_URL}/feed", headers={"Authorization": f"Bearer {self.alice_token}"})
-        if response.status_code == 200 and any(tweet["owner_id"] == int(self.bob["id"]) for tweet in response.json()):
-            # Alice already follows Bob, proceed to unfollow
-            pass
-        else:
-            # Follow Bob if not already followed
-            self.follow_user(self.bob["id"], self.alice_token)
-        response = requests.delete(
-            f"{BASE_URL}/follow/{self.bob['id']}",
-            headers={"Authorization": f"Bearer {self.alice_token}"}
+        # setUpClass established the Alice->Bob follow
+        response = self.s.delete(
+            f"/follow/{self.bob_id}",
+            headers=self.alice_auth
         )
         self.assertEqual(response.status_code, 200)
-        self.assertEqual(response.json()["message"], "Unfollowed successfully")
+        self.assertEqual(j(response)["message"], "Unfollowed successfully")
 
         # Test unfollow non-existent
-        response = requests.delete(
-            f"{BASE_URL}/follow/{self.bob['id']}",
-            headers={"Authorization": f"Bearer {self.alice_token}"}
+        response = self.s.delete(
+            f"/follow/{self.bob_id}",
+            headers=self.alice_auth
         )
         self.assertEqual(response.status_code, 404)
     def test_get_feed_pagination(self):
-        response = requests.get(
-            f"{BASE_URL}/feed?skip=0&limit=3&sort=desc",
-            headers={"Authorization": f"Bearer {self.alice_token}"}
-        )
-        self.assertEqual(response.status_code, 200)
-        data = response.json()
-        self.assertLessEqual(len(data), 3)
+        first, ascending = self.get_all(
+            "/feed?limit=3&sort=desc",
+            "/feed?limit=3&sort=asc",
+            headers=self.alice_auth
+        )
+        self.assertEqual(first.status_code, 200)
+        data = j(first)
+        self.assertTrue(len(data) <= 3)
         for tweet in data:
-            self.assertEqual(tweet["owner_id"], int(self.bob["id"]))
+            self.assertEqual(tweet["owner_id"], self.bob_id)
         if len(data) > 1:
-            self.assertGreaterEqual(
-                datetime.fromisoformat(data[0]["created_at"].replace("Z", "+00:00")),
-                datetime.fromisoformat(data[1]["created_at"].replace("Z", "+00:00"))
-            )
+            self.assertGreaterEqual(data[0]["created_at"], data[1]["created_at"])
         if data:
             self.assertIn("likes_count", data[0])
             self.assertIn("created_at", data[0])
 
         # Second page
-        response = requests.get(
-            f"{BASE_URL}/feed?skip=3&limit=3&sort=desc",
-            headers={"Authorization": f"Bearer {self.alice_token}"}
-        )
-        self.assertEqual(response.status_code, 200)
-        self.assertLessEqual(len(response.json()), 3)
+        if data:
+            last = data[-1]
+            second = self.s.get(
+                "/feed",
+                params={"limit": 3, "sort": "desc", "cursor": f"{last['created_at']},{last['id']}"},
+                headers=self.alice_auth
+            )
+            self.assertEqual(second.status_code, 200)
+            self.assertTrue(len(j(second)) <= 3)
+            for tweet in j(second):
+                self.assertEqual(tweet["owner_id"], self.bob_id)
+                self.assertNotIn(tweet["id"], [t["id"] for t in data])
 
         # Ascending sort
-        response = requests.get(
-            f"{BASE_URL}/feed?skip=0&limit=3&sort=asc",
-            headers={"Authorization": f"Bearer {self.alice_token}"}
-        )
-        self.assertEqual(response.status_code, 200)
-        data = response.json()
+        self.assertEqual(ascending.status_code, 200)
+        data = j(ascending)
         if len(data) > 1:
-            self.assertLessEqual(
-                datetime.fromisoformat(data[0]["created_at"].replace("Z", "+00:00")),
-                datetime.fromisoformat(data[1]["created_at"].replace("Z", "+00:00"))
-            )
+            self.assertLessEqual(data[0]["created_at"], data[1]["created_at"])
 
     def test_unauthorized_access(self):
-        response = requests.get(f"{BASE_URL}/feed")
+        response = self.s.get("/feed")
         self.assertEqual(response.status_code, 401)
 
-    def test_invalid_pagination(self):
-        response = requests.get(
-            f"{BASE_URL}/feed?skip=-1&limit=3&sort=desc",
-            headers={"Authorization": f"Bearer {self.alice_token}"}
-        )
-        self.assertEqual(response.status_code, 422)  # FastAPI validation error
+        response = self.s.get("/feed", headers=auth_headers("not-a-token"))
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(j(response)["detail"], "Could not validate credentials")
 
-        response = requests.get(
-            f"{BASE_URL}/tweets/me?skip=0&limit=101&sort=desc",
-            headers={"Authorization": f"Bearer {self.alice_token}"}
-        )
-        self.assertEqual(response.status_code, 422)
+    @unittest.skipIf(INTEGRATION, "signs a token with the in-process app's key")
+    def test_expired_token(self):
+        token = create_access_token({"sub": str(self.alice_id)}, expires_delta=timedelta(minutes=-1))
+        response = self.s.get("/feed", headers=auth_headers(token))
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(j(response)["detail"], "Token has expired")
+
+    def test_invalid_pagination(self):
+        responses = self.get_all(
+            "/feed?skip=-1&limit=3&sort=desc",
+            "/tweets/me?skip=0&limit=101&sort=desc",
+            "/tweets?cursor=not-a-cursor",
+            headers=self.alice_auth
+        )
+        for response in responses:
+            self.assertEqual(response.status_code, 422)  # FastAPI validation error
     
     def test_get_user_profile(self):
-        response = requests.get(f"{BASE_URL}/users/{self.alice['id']}")
+        response = self.s.get(f"/users/{self.alice_id}")
         self.assertEqual(response.status_code, 200)
-        data = response.json()
+        data = j(response)
         self.assertEqual(data["username"], "alice_test")
         self.assertEqual(data["tweet_count"], len(self.alice_tweets))
         self.assertEqual(data["follower_count"], 1)  # Bob follows Alice
         self.assertEqual(data["following_count"], 1)  # Alice follows Bob
     
     def test_search_tweets(self):
-        response = requests.get(f"{BASE_URL}/tweets/search?keyword=Alice")
+        response = self.s.get("/tweets/search?keyword=Alice")
         self.assertEqual(response.status_code, 200)
-        data = response.json()
-        self.assertLessEqual(len(data), 10)
+        data = j(response)
+        self.assertTrue(len(data) <= 10)
         for tweet in data:
             self.assertIn("Alice", tweet["content"])
 
+        # case-insensitive, like the ilike search it replaced
+        response = self.s.get("/tweets/search?keyword=alice")
+        self.assertEqual(response.status_code, 200)
+        data = j(response)
+        self.assertTrue(data)
+        for tweet in data:
+            self.assertIn("alice", tweet["content"].lower())
+
+class FakeRedis:
+    # just enough of redis.asyncio.Redis for RedisCache, kept in a dict
+    def __init__(self):
+        self.store = {}
+
+    async def get(self, key):
+        return self.store.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.store[key] = value
+
+    async def scan_iter(self, match="*", count=None):
+        for key in list(self.store):
+            if fnmatch.fnmatchcase(key, match):
+                yield key
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.store.pop(key, None)
+
+
+@unittest.skipIf(INTEGRATION, "swaps the in-process app's cache client")
+class CacheTests(APITestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.open_client()
+        cls.frank, cls.frank_token = cls.register_or_login("frank_test", "password123")
+        cls.grace, cls.grace_token = cls.register_or_login("grace_test", "password123")
+        cls.frank_auth = auth_headers(cls.frank_token)
+        cls.create_tweets(["Grace's first tweet"], cls.grace_token)
+
+    def setUp(self):
+        self.redis = FakeRedis()
+        cache.client = self.redis
+
+    def tearDown(self):
+        cache.client = None
+
+    def cached_reads(self):
+        return {
+            "tweets": j(self.s.get("/tweets")),
+            "frank": j(self.s.get(f"/users/{self.frank['id']}")),
+            "grace": j(self.s.get(f"/users/{self.grace['id']}")),
+            "feed": j(self.s.get("/feed", headers=self.frank_auth)),
+        }
+
+    def uncached_reads(self):
+        cache.client = None
+        try:
+            return self.cached_reads()
+        finally:
+            cache.client = self.redis
+
+    def count_queries(self):
+        statements = []
+        def on_execute(conn, cursor, statement, *args):
+            statements.append(statement)
+        event.listen(database.engine.sync_engine, "before_cursor_execute", on_execute)
+        self.addCleanup(event.remove, database.engine.sync_engine, "before_cursor_execute", on_execute)
+        return statements
+
+    def test_hit_skips_db(self):
+        first = self.cached_reads()
+        self.assertTrue(self.redis.store)
+
+        statements = self.count_queries()
+        self.assertEqual(self.cached_reads(), first)
+        self.assertEqual(statements, [])
+
+    def test_writes_invalidate_cached_reads(self):
+        writes = [
+            ("follow", lambda: self.follow_user(int(self.grace["id"]), self.frank_token)),
+            ("tweet", lambda: self._post("/tweets", json={"content": "Grace again"}, token=self.grace_token)),
+            # the newest tweet, so the like shows on the first page of each list
+            ("like", lambda: self._post("/like", json={"tweet_id": j(self.s.get("/tweets?limit=1"))[0]["id"]}, token=self.frank_token)),
+        ]
+        for name, write in writes:
+            with self.subTest(write=name):
+                before = self.cached_reads()
+                write()
+                after = self.cached_reads()
+                # every read reflects the write, none is served stale
+                self.assertEqual(after, self.uncached_reads())
+                self.assertNotEqual(after, before)
+
+    def test_large_bodies_decode_with_and_without_gzip(self):
+        self.create_tweets([f"Grace's long tweet {i} " + "x" * 80 for i in range(10)], self.grace_token)
+        expected = self.uncached_reads()["tweets"]
+
+        for accept in ("gzip", "identity"):
+            # cache disabled, then a miss and a hit with it enabled
+            for enabled in (False, True, True):
+                cache.client = self.redis if enabled else None
+                with self.subTest(accept=accept, cached=enabled):
+                    response = self.s.get("/tweets", headers={"Accept-Encoding": accept})
+                    self.assertEqual(response.status_code, 200)
+                    self.assertEqual(response.headers.get("content-encoding"), "gzip" if accept == "gzip" else None)
+                    self.assertTrue(len(response.content) >= 500)
+                    # compressed exactly once: httpx undoes one gzip layer
+                    self.assertEqual(j(response), expected)
+            self.redis.store.clear()
+
+    def test_redis_errors_count_as_misses(self):
+        cache.client = None
+        cache.url = "redis://127.0.0.1:1/0"  # nothing listens there
+        self.s.portal.call(cache.connect)
+        try:
+            self.assertEqual(self.s.get("/tweets").status_code, 200)
+            self._post("/tweets", json={"content": "Still works"}, token=self.frank_token)
+            self.assertEqual(self.s.get(f"/users/{self.frank['id']}").status_code, 200)
+        finally:
+            self.s.portal.call(cache.close)
+            cache.url = None
+
+
+# Read-only tests that only look at the setUpClass fixtures. They run
+# concurrently first; everything else writes (or, like the profile counts,
+# depends on earlier writes) and runs serially afterwards in the usual order.
+PARALLEL_TESTS = {
+    "test_expired_token",
+    "test_get_feed_pagination",
+    "test_get_likes",
+    "test_get_my_tweets_pagination",
+    "test_get_tweets_cursor_pagination",
+    "test_get_tweets_pagination",
+    "test_invalid_pagination",
+    "test_search_tweets",
+    "test_unauthorized_access",
+}
+
+
+# Every test records into a result of its own, so the threads never share one
+def run_test(test):
+    result = unittest.TestResult()
+    test(result)
+    return result
+
+
+def run_concurrently():
+    tests = list(unittest.defaultTestLoader.loadTestsFromTestCase(TwitterAPITests))
+    parallel = [test for test in tests if test.id().rsplit(".", 1)[-1] in PARALLEL_TESTS]
+    serial = [test for test in tests if test not in parallel]
+
+    TwitterAPITests.setUpClass()
+    try:
+        # the tests are I/O bound, so threads overlap the request latency
+        with ThreadPoolExecutor(max_workers=max(1, (os.cpu_count() or 1) - 2)) as pool:
+            results = list(pool.map(run_test, parallel))
+        results += [run_test(test) for test in serial]
+    finally:
+        TwitterAPITests.tearDownClass()
+    results.append(run_test(unittest.defaultTestLoader.loadTestsFromTestCase(CacheTests)))
+
+    for result in results:
+        for label, problems in (("ERROR", result.errors), ("FAIL", result.failures)):
+            for test, traceback in problems:
+                print("=" * 70)
+                print(f"{label}: {test}")
+                print("-" * 70)
+                print(traceback)
+    skipped = sum(len(result.skipped) for result in results)
+    successful = all(result.wasSuccessful() for result in results)
+    print(f"\nRan {sum(result.testsRun for result in results)} tests")
+    print(("OK" if successful else "FAILED") + (f" (skipped={skipped})" if skipped else ""))
+    return successful
+
+
 if __name__ == "__main__":
-    unittest.main()
\ No newline at end of file
+    sys.exit(0 if run_concurrently() else 1)
\ No newline at end of file